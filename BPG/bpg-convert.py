@@ -1,8 +1,18 @@
 import os
 import sys
 import subprocess
+import argparse
+import functools
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from loky import ProcessPoolExecutor
+from loky import get_reusable_executor
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
 
 # --- Configuration ---
 
@@ -18,8 +28,31 @@ BIT_DEPTH = 12
 # os.cpu_count() is a good default to use all available CPU cores.
 MAX_WORKERS = os.cpu_count()
 
+# Number of files each worker converts per dispatched job. Larger batches
+# amortize the per-job pickling/IPC overhead across several encodes.
+BATCH_SIZE = 8
+
+# Threads that read input files into the OS page cache ahead of the encoders,
+# and how many batches they (and the executor queue) may run ahead by.
+IO_THREADS = 4
+PREFETCH_DEPTH = 2 * MAX_WORKERS
+
+# Threads used to scan the top-level subfolders of the input folder in parallel.
+SCAN_THREADS = 8
+
+# With at least this many workers, per-file lines scroll past too fast to be
+# useful: show a progress bar instead (if tqdm is installed), plus failures.
+QUIET_WORKERS = 8
+
+# Rough encoding speed of one worker, in MB of input per second. Only used by
+# --dry-run to estimate how long a run will take.
+AVG_MBPS = 1.0
+
 # --- Script Logic (No need to edit below this line) ---
 
+# Input file extensions picked up by the scan (compared in lower case).
+IMAGE_EXTENSIONS = (".png", ".jpeg", ".jpg")
+
 def find_encoder():
     """Finds the bpgenc.exe executable."""
     # Check for a manual override path first.
@@ -49,83 +82,414 @@ def find_encoder():
     print(f"Found encoder: {encoder_path}")
     return str(encoder_path)
 
-def convert_to_bpg(task_args):
+# Keyword arguments for subprocess.run(), built once when the script starts.
+# The worker functions are pickled by value together with the globals they
+# use, so each job receives this dict ready-made. stdout is discarded by the
+# OS; only stderr (usually empty) is piped back, and it is decoded only if
+# the encoder fails.
+_RUN_KWARGS = {
+    "check": True,
+    "stdout": subprocess.DEVNULL,
+    "stderr": subprocess.PIPE,
+}
+if sys.platform == "win32":
+    # Skip console allocation for every spawned encoder.
+    _RUN_KWARGS["creationflags"] = subprocess.CREATE_NO_WINDOW
+
+def run_encoder(cmd):
+    """Runs bpgenc with the shared subprocess options."""
+    return subprocess.run(cmd, **_RUN_KWARGS)
+
+def fixed_command(encoder_path, bit_depth):
+    """
+    Returns the part of the bpgenc command shared by every file. It is built
+    once in the main process and sent along with each batch: this script
+    runs as __main__, so loky pickles the worker functions by value and
+    module globals set inside a worker would not be seen by later jobs.
+    On Windows it is returned as an already quoted command line string, so
+    only the per-file arguments need quoting for each call.
+    """
+    cmd = [encoder_path, "-b", str(bit_depth)]
+    if sys.platform == "win32":
+        return subprocess.list2cmdline(cmd)
+    return cmd
+
+def encoder_command(fixed_cmd, input_path, output_path):
+    """
+    Returns the bpgenc command for one file: an argv list, or on Windows
+    the equivalent command line string.
+    """
+    file_args = ["-o", output_path, input_path]
+    if isinstance(fixed_cmd, str):
+        return fixed_cmd + " " + subprocess.list2cmdline(file_args)
+    return fixed_cmd + file_args
+
+def convert_to_bpg(fixed_cmd, input_path, output_path):
     """
     Worker function to convert an image to BPG.
-    Accepts a tuple of arguments to be compatible with the executor.
     Supports PNG and JPEG/JPG input files.
+    Returns (succeeded, message); the message is printed by the main process
+    so that workers never contend for the console.
+    bpgenc truncates its output file before reading the input, so it encodes
+    to a temporary file that only replaces output_path once it is complete.
+    An interrupted or failed encode then never leaves behind a .bpg that
+    resume mode would take for an up-to-date conversion.
     """
-    encoder_path, input_path, output_path, bit_depth = task_args
-    
-    cmd = [
-        encoder_path,
-        "-b", str(bit_depth),
-        "-o", str(output_path),
-        str(input_path)
-    ]
+    temp_path = output_path + ".tmp"
+    cmd = encoder_command(fixed_cmd, input_path, temp_path)
     try:
-        # Using capture_output=True and text=True to hide subprocess output
-        # unless there is an error.
-        result = subprocess.run(
-            cmd, 
-            check=True, 
-            capture_output=True, 
-            text=True
-        )
-        print(f"SUCCESS: {input_path} → {output_path}")
+        # Output is hidden unless there is an error.
+        run_encoder(cmd)
+        os.replace(temp_path, output_path)
+        return True, f"SUCCESS: {input_path} → {output_path}"
     except subprocess.CalledProcessError as e:
-        print(f"--- FAILED to convert {input_path} ---")
-        print(f"Command: {' '.join(cmd)}")
-        print(f"Error: {e}")
-        print(f"STDOUT: {e.stdout}")
-        print(f"STDERR: {e.stderr}")
-        print("-----------------------------------------")
+        remove_quietly(temp_path)
+        return False, "\n".join([
+            f"--- FAILED to convert {input_path} ---",
+            f"Command: {cmd if isinstance(cmd, str) else ' '.join(cmd)}",
+            f"Error: {e}",
+            f"STDERR: {e.stderr.decode(errors='replace')}",
+            "-----------------------------------------",
+        ])
+    except OSError as e:
+        remove_quietly(temp_path)
+        return False, "\n".join([
+            f"--- FAILED to convert {input_path} ---",
+            f"Error: {e}",
+            "-----------------------------------------",
+        ])
+
+def remove_quietly(path):
+    """Deletes path if it exists, ignoring any error."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def convert_batch(batch, fixed_cmd, cpus=None):
+    """
+    Worker function that converts a batch of images in a single job and
+    returns the (succeeded, message) pair of each conversion.
+    A batch is an (input_paths, output_paths) pair of parallel lists, and
+    fixed_cmd the shared part of the encoder command.
+    If `cpus` is given, the worker (and so every bpgenc it spawns) is first
+    pinned to those CPU cores.
+    """
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    return list(map(functools.partial(convert_to_bpg, fixed_cmd), *batch))
+
+def batches_of(input_paths, output_paths, size, workers):
+    """
+    Splits the parallel task lists into (input_paths, output_paths) batches
+    of at most `size` files, making at least one batch per worker when there
+    are enough files to keep every worker busy.
+    Files are dealt out round-robin, so when the lists are sorted
+    largest-first every batch gets a similar share of the work and the
+    batches themselves still come out largest-first.
+    """
+    count = max(-(-len(input_paths) // size), min(len(input_paths), workers))
+    return [(input_paths[i::count], output_paths[i::count]) for i in range(count)]
+
+def prefetch_file(path):
+    """
+    Pulls a file into the OS page cache so bpgenc can read it from memory.
+    Errors are ignored here; the encoder reports them for the task.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except OSError:
+        return
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        else:
+            # No readahead hint available (Windows): just read it through.
+            while os.read(fd, 1 << 20):
+                pass
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def prefetch_batch(batch):
+    """Prefetches the input files of one (input_paths, output_paths) batch."""
+    for input_path in batch[0]:
+        prefetch_file(input_path)
+
+def iter_prefetched(batches):
+    """
+    Yields batches in their original order (largest first) once their input
+    files have been prefetched. IO_THREADS threads do the reading, staying
+    at most PREFETCH_DEPTH batches ahead of the consumer. A batch that is
+    ready early waits for the ones before it, so the scheduling order is kept.
+    """
+    with ThreadPoolExecutor(max_workers=IO_THREADS) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, pool.submit(prefetch_batch, batch)))
+            if len(pending) >= PREFETCH_DEPTH:
+                batch, future = pending.popleft()
+                future.result()
+                yield batch
+        for batch, future in pending:
+            future.result()
+            yield batch
+
+def run_batches(executor, batches, fixed_cmd, max_in_flight, free_core_sets=None):
+    """
+    Submits batches to the executor once their inputs have been prefetched
+    and yields the (succeeded, message) results of each batch as soon as it
+    completes, so a slow batch never holds up the ones behind it.
+    At most max_in_flight jobs are queued or running at a time, which in turn
+    keeps the prefetch threads from running too far ahead of the encoders.
+    If free_core_sets is given, each job checks out a set of CPU cores to pin
+    its worker to and returns it when done.
+    """
+    completed = queue.Queue()
+
+    def job_done(future, cpus=None):
+        if cpus is not None:
+            free_core_sets.put(cpus)
+        completed.put(future)
+
+    in_flight = 0
+    for batch in iter_prefetched(batches):
+        while in_flight >= max_in_flight:
+            in_flight -= 1
+            # result() re-raises any unexpected error from the worker.
+            yield from completed.get().result()
+        cpus = free_core_sets.get() if free_core_sets is not None else None
+        future = executor.submit(convert_batch, batch, fixed_cmd, cpus)
+        future.add_done_callback(functools.partial(job_done, cpus=cpus))
+        in_flight += 1
+
+    while in_flight:
+        in_flight -= 1
+        yield from completed.get().result()
+
+def iter_images(input_dir, output_dir):
+    """
+    Recursively yields (entry, output_dir) for every supported image file
+    below input_dir, where output_dir is the matching folder under the
+    output root. Paths are kept as plain strings; os.scandir() entries and
+    os.path.join() avoid building Path objects for every file.
+    Folders that can't be read are skipped, as os.walk() does.
+    """
+    try:
+        entries = os.scandir(input_dir)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_images(entry.path, os.path.join(output_dir, entry.name))
+            elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                yield entry, output_dir
+
+def scan_images(input_dir, output_dir):
+    """
+    Yields the same (entry, output_dir) pairs as iter_images(), but walks
+    each top-level subfolder of input_dir on its own thread. Subtrees are
+    yielded as soon as they have been scanned, in no particular order.
+    """
+    subdirs = []
+    try:
+        entries = os.scandir(input_dir)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry)
+            elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                yield entry, output_dir
+
+    with ThreadPoolExecutor(max_workers=SCAN_THREADS) as pool:
+        futures = [
+            pool.submit(list, iter_images(subdir.path, os.path.join(output_dir, subdir.name)))
+            for subdir in subdirs
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+def is_up_to_date(entry, output_path):
+    """
+    Returns True if output_path exists, is not empty and is at least as new
+    as the input. An empty output is what a killed encoder leaves behind.
+    """
+    try:
+        output_stat = os.stat(output_path)
+    except FileNotFoundError:
+        return False
+    if output_stat.st_size == 0:
+        return False
+    # DirEntry.stat() is cached from the directory scan on Windows.
+    return output_stat.st_mtime >= entry.stat().st_mtime
+
+def leaf_dirs(dirs):
+    """Returns the directories in dirs that are not a parent of another one.
+
+    os.makedirs creates the missing parents anyway, so only these need a call.
+    """
+    parents = set()
+    for d in dirs:
+        parent = os.path.dirname(d)
+        while parent not in parents and parent != d:
+            parents.add(parent)
+            d, parent = parent, os.path.dirname(parent)
+    return set(dirs) - parents
+
+def plan_core_sets(threads_per_worker):
+    """
+    Splits the available CPU cores into one block of `threads_per_worker`
+    cores per worker. Returns (worker_count, core_sets), where core_sets is
+    None if this platform doesn't support pinning processes to cores.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count()))
+    workers = max(1, len(cpus) // threads_per_worker)
+    if not hasattr(os, "sched_setaffinity"):
+        return workers, None
+    core_sets = [
+        cpus[i * threads_per_worker:(i + 1) * threads_per_worker]
+        for i in range(workers)
+    ]
+    return workers, core_sets
+
+def parse_args():
+    """Parses the command line options."""
+    parser = argparse.ArgumentParser(description="Batch convert PNG/JPEG images to BPG.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-encode files even if an up-to-date .bpg output already exists"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="scan and schedule the files, print the task count, total input "
+             "size and an estimated run time, then exit without encoding"
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        metavar="N",
+        help="run one worker per N CPU cores and pin each worker's encoder to "
+             "its own N cores (Linux only), instead of one unpinned worker per "
+             "core; x265 then spreads each image over those N cores"
+    )
+    args = parser.parse_args()
+    if args.threads_per_worker is not None and args.threads_per_worker < 1:
+        parser.error("--threads-per-worker must be at least 1")
+    return args
 
 
 def main():
     """Main function to find files and process them in parallel."""
+    args = parse_args()
     bpg_encoder_path = find_encoder()
     
     input_folder = Path(INPUT_FOLDER)
-    output_root = Path(OUTPUT_ROOT)
 
     if not input_folder.is_dir():
         print(f"Error: Input folder not found at '{INPUT_FOLDER}'")
         sys.exit(1)
 
-    # 1. Collect all conversion tasks
-    tasks = []
+    # 1. Collect all conversion tasks. They are kept as parallel lists of
+    # plain values rather than a list of per-file tuples.
+    input_paths = []
+    output_paths = []
+    input_sizes = []
+    output_dirs = set()
+    skipped = 0
     print("\nScanning for all supported files...")
-    for root, _, files in os.walk(input_folder):
-        for file in files:
-            if file.lower().endswith((".png", ".jpeg", ".jpg")):
-                input_path = Path(root) / file
-                
-                # Recreate the directory structure in the output folder
-                relative_path = input_path.parent.relative_to(input_folder)
-                output_dir = output_root / relative_path
-                output_dir.mkdir(parents=True, exist_ok=True)
-
-                # Define the output file path
-                bpg_filename = input_path.with_suffix(".bpg").name
-                output_path = output_dir / bpg_filename
-
-                # Add the task arguments as a tuple to our list
-                tasks.append((bpg_encoder_path, input_path, output_path, BIT_DEPTH))
-
-    if not tasks:
-        print("No supported image files found. Exiting.")
+    for entry, output_dir in scan_images(INPUT_FOLDER, OUTPUT_ROOT):
+        input_path = entry.path
+        bpg_filename = os.path.splitext(entry.name)[0] + ".bpg"
+        output_path = os.path.join(output_dir, bpg_filename)
+
+        # Skip files converted by a previous (possibly interrupted) run.
+        if not args.force and is_up_to_date(entry, output_path):
+            skipped += 1
+            continue
+
+        # Recreate the directory structure in the output folder
+        output_dirs.add(output_dir)
+        # DirEntry.stat() reuses the scan's stat data where it can.
+        input_paths.append(input_path)
+        output_paths.append(output_path)
+        input_sizes.append(entry.stat().st_size)
+
+    if skipped:
+        print(f"Skipping {skipped} files that are already converted (use --force to re-encode).")
+
+    if not input_paths:
+        print("No supported image files to convert. Exiting.")
+        return
+
+    # Schedule the largest files first so a big image picked up late doesn't
+    # leave one worker running long after all the others have finished.
+    order = sorted(range(len(input_paths)), key=input_sizes.__getitem__, reverse=True)
+    input_paths = [input_paths[i] for i in order]
+    output_paths = [output_paths[i] for i in order]
+    input_sizes = [input_sizes[i] for i in order]
+
+    workers = MAX_WORKERS
+    free_core_sets = None
+    if args.threads_per_worker:
+        workers, core_sets = plan_core_sets(args.threads_per_worker)
+        if core_sets is not None:
+            # Jobs check out a core set on submit and return it when done,
+            # so no two running encoders share a core.
+            free_core_sets = queue.Queue()
+            for cpus in core_sets:
+                free_core_sets.put(cpus)
+
+    if args.dry_run:
+        # Stop before any worker process is started. With largest-first
+        # scheduling a run takes at least as long as the biggest file.
+        total_mb = sum(input_sizes) / (1024 * 1024)
+        largest_mb = input_sizes[0] / (1024 * 1024)
+        estimate = max(total_mb / workers, largest_mb) / AVG_MBPS
+        batches = batches_of(input_paths, output_paths, BATCH_SIZE, workers)
+        print(f"Dry run: {len(input_paths)} files, {total_mb:.1f} MB in total, "
+              f"{len(batches)} batches for {workers} workers.")
+        print(f"Largest file: {input_paths[0]} ({largest_mb:.1f} MB)")
+        print(f"Estimated time: ~{estimate:.0f}s at {AVG_MBPS} MB/s per worker.")
         return
 
-    print(f"Found {len(tasks)} files to convert. Starting parallel processing with {MAX_WORKERS} workers...")
+    # Create each output directory once, instead of once per file.
+    for output_dir in sorted(leaf_dirs(output_dirs)):
+        os.makedirs(output_dir, exist_ok=True)
+
+    print(f"Found {len(input_paths)} files to convert. Starting parallel processing with {workers} workers...")
 
     # 2. Process tasks in parallel using Loky
-    # The 'with' statement ensures the pool is properly shut down
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        # map() distributes the tasks from the 'tasks' list to the
-        # 'convert_to_bpg' worker function.
-        # We wrap it in list() to ensure we wait for all tasks to complete.
-        list(executor.map(convert_to_bpg, tasks))
+    # The reusable executor keeps its workers alive between jobs, so the
+    # process startup cost is paid once per worker rather than once per file.
+    executor = get_reusable_executor(max_workers=workers)
+    fixed_cmd = fixed_command(bpg_encoder_path, BIT_DEPTH)
+    batches = batches_of(input_paths, output_paths, BATCH_SIZE, workers)
+    # Pinned jobs can't outnumber the core sets handed out to them.
+    max_in_flight = PREFETCH_DEPTH if free_core_sets is None else workers
+
+    # All console output happens here in the main process.
+    progress = None
+    if tqdm is not None and workers >= QUIET_WORKERS:
+        progress = tqdm(total=len(input_paths), unit="file")
+
+    for succeeded, message in run_batches(executor, batches, fixed_cmd, max_in_flight, free_core_sets):
+        if progress is None:
+            print(message)
+        else:
+            if not succeeded:
+                progress.write(message)
+            progress.update()
+    if progress is not None:
+        progress.close()
 
     print("\nAll tasks completed.")
 
@@ -4,11 +4,21 @@ import subprocess
 import shutil
 import time
 import argparse
+import functools
+import hashlib
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from loky import ProcessPoolExecutor
+from loky import get_reusable_executor
 from colorama import init, Fore, Style
 from dataclasses import dataclass
-from typing import List, Tuple
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
 
 init(autoreset=True)
 
@@ -17,6 +27,14 @@ INPUT_FOLDER = r"D:\s24-temp2"
 OUTPUT_ROOT = r"D:\s24-temp2\bpg"
 BIT_DEPTH = 10
 MAX_WORKERS = os.cpu_count()
+BATCH_SIZE = 8  # files converted per worker job
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+IO_THREADS = 4  # threads warming the page cache ahead of the encoders
+PREFETCH_DEPTH = 2 * MAX_WORKERS  # batches queued/in flight ahead of the encoders
+SCAN_THREADS = 8  # threads scanning top-level input subfolders in parallel
+QUIET_WORKERS = 8  # from this many workers, show a progress bar instead of per-file lines
+AVG_MBPS = 1.0  # rough input MB/s encoded per worker, for the --dry-run time estimate
+MAX_RETRIES = 3  # retries for transient OS errors (files locked by antivirus, network drive hiccups)
 
 class Colors:
     HEADER    = Fore.CYAN + Style.BRIGHT
@@ -29,15 +47,33 @@ class Colors:
     TOTAL     = Fore.LIGHTGREEN_EX
     RESET     = Style.RESET_ALL
 
+# Workers return results as plain tuples of primitives, which pickle much
+# smaller than a dataclass, including the pre-formatted log line so that
+# only the main process writes to the console:
+# (input_path, output_path, input_size, output_size, time_taken, message, retries)
+PackedResult = Tuple[str, str, int, int, float, str, int]
+
 @dataclass
 class ConversionResult:
-    input_path: Path
-    output_path: Path
+    input_path: str
+    output_path: str
     input_size: int
     output_size: int
     time_taken: float
     ratio: float
     saved_bytes: int
+    retries: int = 0
+
+    @classmethod
+    def unpack(cls, packed: PackedResult) -> "ConversionResult":
+        input_path, output_path, input_size, output_size, time_taken, _, retries = packed
+        if output_size > 0:
+            ratio = output_size / input_size
+            saved_bytes = input_size - output_size
+        else:
+            ratio = 999.0
+            saved_bytes = -input_size
+        return cls(input_path, output_path, input_size, output_size, time_taken, ratio, saved_bytes, retries)
 
 def find_encoder() -> str:
     encoders = {
@@ -71,66 +107,312 @@ def find_encoder() -> str:
     print(f"{Fore.RED}Error: '{encoder_name}' not found!{Colors.RESET}")
     sys.exit(1)
 
-def convert_to_bpg(task_args) -> ConversionResult:
-    encoder_path, input_path, output_path, bit_depth, codec = task_args
+# subprocess.run() options, built once at startup. The worker functions are
+# pickled by value along with the globals they use, so every job receives
+# them ready-made. stdout goes straight to the null device; stderr is only
+# decoded on failure
+_RUN_KWARGS = {"stdout": subprocess.DEVNULL, "stderr": subprocess.PIPE, "check": True}
+if sys.platform == "win32":
+    # Don't allocate a console for every encoder process
+    _RUN_KWARGS["creationflags"] = subprocess.CREATE_NO_WINDOW
+
+def run_encoder(cmd: Union[List[str], str]) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, **_RUN_KWARGS)
+
+# The fixed part of the encoder command: an argv list, or on Windows the
+# pre-quoted command line, so each call only quotes the per-file arguments
+FixedCommand = Union[List[str], str]
+
+def fixed_command(encoder_path: str, bit_depth: int, codec: str) -> FixedCommand:
+    # Encoder arguments shared by every task, built once in the main process
+    # and sent with each batch. Not set up in a pool initializer: this script
+    # runs as __main__, so loky pickles the worker functions by value and
+    # globals assigned in a worker are never seen by later jobs
+    cmd = [
+        encoder_path,
+        "-b", str(bit_depth),
+        "-c", "ycbcr",
+        "-f", "444",
+        "-m", "9",
+        "-e", "jctvc" if codec == "jctvc" else "x265",
+    ]
+    if sys.platform == "win32":
+        return subprocess.list2cmdline(cmd)
+    return cmd
+
+def encoder_command(fixed_cmd: FixedCommand, input_path: str, output_path: str) -> Union[List[str], str]:
+    file_args = ["-o", output_path, input_path]  # direct file input
+    if isinstance(fixed_cmd, str):
+        return fixed_cmd + " " + subprocess.list2cmdline(file_args)
+    return fixed_cmd + file_args
+
+def convert_to_bpg(fixed_cmd: FixedCommand, input_path: str, output_path: str,
+                   input_size: int) -> PackedResult:
     start_time = time.perf_counter()
+    retries = 0
+    # bpgenc truncates its output before reading the input, so encode to a
+    # temporary file and only move it into place once complete: a killed or
+    # failed encode must not leave a fresh .bpg that resume mode would skip
+    temp_path = output_path + ".tmp"
+
+    def failed(e: Exception) -> PackedResult:
+        remove_quietly(temp_path)
+        time_taken = time.perf_counter() - start_time
+        message = f"{Fore.RED}Failed: {os.path.basename(input_path)} ({time_taken:.2f}s)\n   {e}{Colors.RESET}"
+        if isinstance(e, subprocess.CalledProcessError) and e.stderr:
+            message += f"\n{Fore.RED}   {e.stderr.decode(errors='replace').strip()}{Colors.RESET}"
+        return (input_path, output_path, input_size, 0, time_taken, message, retries)
+
+    while True:
+        try:
+            run_encoder(encoder_command(fixed_cmd, input_path, temp_path))
+            os.replace(temp_path, output_path)
+            output_size = os.stat(output_path).st_size
+            break
+        except subprocess.CalledProcessError as e:
+            # A file briefly locked by antivirus or an indexer, or a network
+            # drive hiccup, makes bpgenc's fopen() fail and bpgenc exit 1.
+            # It prints the same "Could not read" for an input it can't
+            # decode, so retry only if the input can't be opened from here
+            # either, or if it couldn't create its output (perror() output)
+            stderr = e.stderr.decode(errors='replace') if e.stderr else ""
+            error = e
+            transient = (
+                ("Could not read" in stderr and input_locked(input_path))
+                or stderr.startswith(temp_path + ":")
+            )
+        except FileNotFoundError as e:
+            # Missing encoder or input file: retrying won't help
+            error, transient = e, False
+        except OSError as e:
+            # Includes PermissionError from starting bpgenc or from moving
+            # its output into place over a file that is briefly locked
+            error, transient = e, True
+        if not transient or retries == MAX_RETRIES:
+            return failed(error)
+        time.sleep(0.1 * 2 ** retries)
+        retries += 1
+
+    time_taken = time.perf_counter() - start_time
+    ratio = output_size / input_size
+
+    message = (
+        f"{Colors.SUCCESS}Converted {os.path.basename(input_path)} → {os.path.basename(output_path)} "
+        f"({input_size/1024:.1f}→{output_size/1024:.1f} KB, {ratio:.1%}) "
+        f"in {time_taken:.2f}s{Colors.RESET}"
+    )
+    if retries:
+        message += f" {Fore.YELLOW}[{retries} {'retry' if retries == 1 else 'retries'}]{Colors.RESET}"
 
-    input_size = input_path.stat().st_size
+    return (input_path, output_path, input_size, output_size, time_taken, message, retries)
 
+def input_locked(path: str) -> bool:
+    # True if the file exists but can't be opened right now
     try:
-        # Build encoder command
-        cmd = [
-            encoder_path,
-            "-b", str(bit_depth),
-            "-o", str(output_path),
-            "-c", "ycbcr",
-            "-f", "444",
-            "-m", "9"
+        with open(path, "rb"):
+            return False
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return True
+
+def remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# Tasks are kept as parallel lists (input paths, output paths, input sizes)
+# rather than a list of per-file tuples; a batch is a slice of each list
+Batch = Tuple[List[str], List[str], List[int]]
+
+def convert_batch(batch: Batch, fixed_cmd: FixedCommand,
+                  cpus: Optional[List[int]] = None) -> List[PackedResult]:
+    # Pin this worker, and thus the bpgenc processes it spawns, to `cpus`
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    return list(map(functools.partial(convert_to_bpg, fixed_cmd), *batch))
+
+def batches_of(in_paths: List[str], out_paths: List[str], sizes: List[int],
+               size: int, workers: int) -> List[Batch]:
+    # At most `size` tasks per batch, but at least one batch per worker.
+    # Deal tasks round-robin so that, for a largest-first task list, batches
+    # carry similar amounts of work and are themselves ordered largest-first
+    count = max(-(-len(in_paths) // size), min(len(in_paths), workers))
+    return [(in_paths[i::count], out_paths[i::count], sizes[i::count]) for i in range(count)]
+
+def iter_images(input_dir: str, output_dir: str) -> Iterator[Tuple[os.DirEntry, str]]:
+    # Recursive os.scandir() walk yielding (entry, mirrored output dir) for
+    # each image; the output dir is derived once per folder, not per file.
+    # Plain strings throughout: no Path objects in the scan hot loop
+    try:
+        entries = os.scandir(input_dir)
+    except OSError:
+        return  # unreadable folder: skip it, as os.walk() does
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_images(entry.path, os.path.join(output_dir, entry.name))
+            elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTS):
+                yield entry, output_dir
+
+def scan_images(input_dir: str, output_dir: str) -> Iterator[Tuple[os.DirEntry, str]]:
+    # Same output as iter_images(), but every top-level subfolder is walked
+    # on its own thread; subtrees are yielded as soon as they finish
+    subdirs = []
+    try:
+        entries = os.scandir(input_dir)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry)
+            elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTS):
+                yield entry, output_dir
+
+    with ThreadPoolExecutor(max_workers=SCAN_THREADS) as pool:
+        futures = [
+            pool.submit(list, iter_images(d.path, os.path.join(output_dir, d.name)))
+            for d in subdirs
         ]
+        for future in as_completed(futures):
+            yield from future.result()
 
-        if codec == "jctvc":
-            cmd.extend(["-e", "jctvc"])
+def is_up_to_date(entry: os.DirEntry, out_path: str) -> bool:
+    # Output exists, isn't empty (as left by a killed encoder) and is no
+    # older than the input; the input's stat comes from the scandir entry
+    # (cached on Windows)
+    try:
+        out_stat = os.stat(out_path)
+    except FileNotFoundError:
+        return False
+    return out_stat.st_size > 0 and out_stat.st_mtime >= entry.stat().st_mtime
+
+def leaf_dirs(dirs: Set[str]) -> Set[str]:
+    # Only folders that aren't the parent of another one need an
+    # os.makedirs call; it creates the missing parents on the way
+    parents: Set[str] = set()
+    for d in dirs:
+        parent = os.path.dirname(d)
+        while parent not in parents and parent != d:
+            parents.add(parent)
+            d, parent = parent, os.path.dirname(parent)
+    return dirs - parents
+
+def prefetch_file(path: str) -> None:
+    # Pull the input into the OS page cache so bpgenc reads it from memory.
+    # Failures are left for the encoder to report.
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except OSError:
+        return
+    try:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
         else:
-            cmd.extend(["-e", "x265"])
-
-        cmd.append(str(input_path))  # direct file input
-
-        subprocess.run(cmd, capture_output=True, check=True)
-
-        output_size = output_path.stat().st_size
-        time_taken = time.perf_counter() - start_time
-        ratio = output_size / input_size
-        saved_bytes = input_size - output_size
-
-        print(
-            f"{Colors.SUCCESS}Converted {input_path.name} → {output_path.name} "
-            f"({input_size/1024:.1f}→{output_size/1024:.1f} KB, {ratio:.1%}) "
-            f"in {time_taken:.2f}s{Colors.RESET}"
-        )
-
-        return ConversionResult(
-            input_path=input_path,
-            output_path=output_path,
-            input_size=input_size,
-            output_size=output_size,
-            time_taken=time_taken,
-            ratio=ratio,
-            saved_bytes=saved_bytes
-        )
-
-    except Exception as e:
-        time_taken = time.perf_counter() - start_time
-        print(f"{Fore.RED}Failed: {input_path.name} ({time_taken:.2f}s)\n   {e}{Colors.RESET}")
-
-        return ConversionResult(
-            input_path=input_path,
-            output_path=output_path,
-            input_size=input_size,
-            output_size=0,
-            time_taken=time_taken,
-            ratio=999.0,
-            saved_bytes=-input_size
-        )
+            while os.read(fd, 1 << 20):
+                pass
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def prefetch_batch(batch: Batch) -> None:
+    for path in batch[0]:
+        prefetch_file(path)
+
+def iter_prefetched(batches: List[Batch]) -> Iterator[Batch]:
+    # I/O stage: IO_THREADS threads prefetch the batches' inputs, staying at
+    # most PREFETCH_DEPTH batches ahead of the consumer. Batches are handed
+    # over in their original (largest-first) order, not as the reads
+    # complete, so the LPT scheduling order survives this stage
+    with ThreadPoolExecutor(max_workers=IO_THREADS) as pool:
+        pending: Deque[Tuple[Batch, Future]] = deque()
+        for batch in batches:
+            pending.append((batch, pool.submit(prefetch_batch, batch)))
+            if len(pending) >= PREFETCH_DEPTH:
+                batch, future = pending.popleft()
+                future.result()
+                yield batch
+        for batch, future in pending:
+            future.result()
+            yield batch
+
+def run_batches(executor, batches: List[Batch], fixed_cmd: FixedCommand, max_in_flight: int,
+                free_core_sets: Optional[queue.Queue] = None) -> Iterator[PackedResult]:
+    # Encode stage: submit each batch once its inputs are prefetched and
+    # yield its results as soon as it completes, in completion order.
+    # Keeping at most max_in_flight jobs queued or running stops the
+    # prefetch stage from running far ahead of the encoders. With
+    # free_core_sets, each job checks out a core set and returns it when done
+    completed: queue.Queue = queue.Queue()
+
+    def job_done(future, cpus: Optional[List[int]] = None) -> None:
+        if cpus is not None:
+            free_core_sets.put(cpus)
+        completed.put(future)
+
+    in_flight = 0
+    for batch in iter_prefetched(batches):
+        while in_flight >= max_in_flight:
+            in_flight -= 1
+            yield from completed.get().result()
+        cpus = free_core_sets.get() if free_core_sets is not None else None
+        future = executor.submit(convert_batch, batch, fixed_cmd, cpus)
+        future.add_done_callback(functools.partial(job_done, cpus=cpus))
+        in_flight += 1
+
+    while in_flight:
+        in_flight -= 1
+        yield from completed.get().result()
+
+def file_digest(path: str) -> bytes:
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+def split_duplicates(in_paths: List[str], out_paths: List[str],
+                     sizes: List[int]) -> Tuple[List[int], Dict[str, List[Tuple[str, str]]]]:
+    # Byte-identical inputs only need to be decoded and encoded once.
+    # Returns the indices of the tasks to encode plus, keyed by the output
+    # path of each encoded task, the (input, output) paths of its duplicates,
+    # whose outputs receive a copy of the encoded file.
+    # Only files with a matching size are hashed, so unique files cost nothing.
+    by_size: Dict[int, List[int]] = defaultdict(list)
+    for i, size in enumerate(sizes):
+        by_size[size].append(i)
+
+    keep: List[int] = []
+    copies: Dict[str, List[Tuple[str, str]]] = {}
+    for same_size in by_size.values():
+        if len(same_size) == 1:
+            keep.extend(same_size)
+            continue
+        by_digest: Dict[bytes, List[int]] = defaultdict(list)
+        for i in same_size:
+            try:
+                by_digest[file_digest(in_paths[i])].append(i)
+            except OSError:
+                keep.append(i)  # let the encoder report it
+        for (first, *rest) in by_digest.values():
+            keep.append(first)
+            if rest:
+                copies[out_paths[first]] = [(in_paths[i], out_paths[i]) for i in rest]
+    return keep, copies
+
+def copy_output(src: str, dst: str) -> None:
+    # Same temp-file-then-rename as the encoder, so an interrupted copy
+    # never leaves a partial output that resume mode would skip
+    temp_path = dst + ".tmp"
+    try:
+        shutil.copyfile(src, temp_path)
+        os.replace(temp_path, dst)
+    except OSError:
+        remove_quietly(temp_path)
+        raise
 
 def format_bytes(b: int) -> str:
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -139,6 +421,19 @@ def format_bytes(b: int) -> str:
         b /= 1024
     return f"{b:,.2f} TB"
 
+def plan_core_sets(threads_per_worker: int) -> Tuple[int, Optional[List[List[int]]]]:
+    # One block of `threads_per_worker` cores per worker. core_sets is None
+    # where the platform can't pin processes (only the worker count applies)
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count()))
+    workers = max(1, len(cpus) // threads_per_worker)
+    if not hasattr(os, "sched_setaffinity"):
+        return workers, None
+    n = threads_per_worker
+    return workers, [cpus[i * n:(i + 1) * n] for i in range(workers)]
+
 def parse_args():
     parser = argparse.ArgumentParser(description='BPG Batch Encoder')
     parser.add_argument(
@@ -148,7 +443,27 @@ def parse_args():
         default='x265',
         help='x265 (default, faster) or jctvc (slower but higher quality)'
     )
-    return parser.parse_args()
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='scan and schedule only: print task count, total size and estimated time without encoding'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='re-encode files that already have an up-to-date .bpg output'
+    )
+    parser.add_argument(
+        '--threads-per-worker',
+        type=int,
+        metavar='N',
+        help='one worker per N cores, each pinned to its own N cores (Linux) '
+             'so x265 spreads an image over them (default: one unpinned worker per core)'
+    )
+    args = parser.parse_args()
+    if args.threads_per_worker is not None and args.threads_per_worker < 1:
+        parser.error('--threads-per-worker must be at least 1')
+    return args
 
 def main():
     args = parse_args()
@@ -158,7 +473,8 @@ def main():
 
     input_folder = Path(INPUT_FOLDER)
     output_root = Path(OUTPUT_ROOT)
-    output_root.mkdir(parents=True, exist_ok=True)
+    if not args.dry_run:
+        output_root.mkdir(parents=True, exist_ok=True)
 
     if not input_folder.exists():
         print(f"{Fore.RED}Input folder not found: {INPUT_FOLDER}{Colors.RESET}")
@@ -166,34 +482,121 @@ def main():
 
     print(f"{Colors.INFO}Scanning PNG/JPG recursively...{Colors.RESET}")
 
-    tasks: List[Tuple[str, Path, Path, int]] = []
-    valid_exts = {".png", ".jpg", ".jpeg"}
-
-    # Faster directory walk
-    for root, dirs, files in os.walk(input_folder):
-        for f in files:
-            file_path = Path(root) / f
-            if file_path.suffix.lower() in valid_exts:
-                rel = file_path.relative_to(input_folder)
-                out_path = output_root / rel.parent / (file_path.stem + ".bpg")
-                out_path.parent.mkdir(parents=True, exist_ok=True)
-                tasks.append((encoder, file_path, out_path, BIT_DEPTH, args.codec))
-
-    if not tasks:
-        print(f"{Fore.YELLOW}No PNG/JPG files found.{Colors.RESET}")
+    in_paths: List[str] = []
+    out_paths: List[str] = []
+    sizes: List[int] = []
+    needed_dirs: Set[str] = set()
+    skipped = 0
+
+    for entry, out_dir in scan_images(INPUT_FOLDER, OUTPUT_ROOT):
+        file_path = entry.path
+        out_path = os.path.join(out_dir, os.path.splitext(entry.name)[0] + ".bpg")
+        # Resume mode: skip outputs left by a previous run unless --force
+        if not args.force and is_up_to_date(entry, out_path):
+            skipped += 1
+            continue
+        needed_dirs.add(out_dir)
+        in_paths.append(file_path)
+        out_paths.append(out_path)
+        sizes.append(entry.stat().st_size)
+
+    if skipped:
+        print(f"{Colors.INFO}Skipped {skipped} already converted files (use --force to re-encode){Colors.RESET}")
+
+    if not in_paths:
+        print(f"{Fore.YELLOW}No PNG/JPG files to convert.{Colors.RESET}")
+        return
+
+    keep, copies = split_duplicates(in_paths, out_paths, sizes)
+    duplicates = sum(len(c) for c in copies.values())
+    if duplicates:
+        print(f"{Colors.INFO}Found {duplicates} duplicate inputs → encoding once and copying{Colors.RESET}")
+
+    # Largest files first (LPT scheduling) to avoid a long single-worker tail
+    keep.sort(key=sizes.__getitem__, reverse=True)
+    in_paths = [in_paths[i] for i in keep]
+    out_paths = [out_paths[i] for i in keep]
+    sizes = [sizes[i] for i in keep]
+
+    workers = MAX_WORKERS
+    free_core_sets: Optional[queue.Queue] = None
+    if args.threads_per_worker:
+        workers, core_sets = plan_core_sets(args.threads_per_worker)
+        if core_sets is not None:
+            # Checked out per job and returned on completion, so running
+            # encoders never share cores
+            free_core_sets = queue.Queue()
+            for cpus in core_sets:
+                free_core_sets.put(cpus)
+
+    if args.dry_run:
+        # Skip worker startup entirely. With LPT scheduling the run can't be
+        # shorter than the largest file's encode
+        total_input = sum(sizes)
+        estimate = max(total_input / workers, sizes[0]) / (AVG_MBPS * 1024 * 1024)
+        batches = batches_of(in_paths, out_paths, sizes, BATCH_SIZE, workers)
+        print(f"{Colors.STATS}Dry run     : {len(in_paths)} files to encode, "
+              f"{len(batches)} batches for {workers} workers{Colors.RESET}")
+        print(f"{Colors.STATS}Input size  : {format_bytes(total_input)} "
+              f"(largest {format_bytes(sizes[0])} ← {os.path.basename(in_paths[0])}){Colors.RESET}")
+        print(f"{Colors.STATS}Est. time   : ~{estimate:.0f}s at {AVG_MBPS} MB/s per worker{Colors.RESET}")
         return
 
-    print(f"{Colors.INFO}Queued {len(tasks)} files → Starting with {MAX_WORKERS} workers...\n{Colors.RESET}")
+    # One mkdir per output folder instead of one per file
+    for d in sorted(leaf_dirs(needed_dirs)):
+        os.makedirs(d, exist_ok=True)
+
+    print(f"{Colors.INFO}Queued {len(in_paths)} files → Starting with {workers} workers...\n{Colors.RESET}")
 
     total_start = time.perf_counter()
 
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        results = list(executor.map(convert_to_bpg, tasks))
+    # Reusable executor: workers stay alive across jobs, and each job
+    # converts a whole batch to amortize per-job IPC overhead
+    executor = get_reusable_executor(max_workers=workers)
+    fixed_cmd = fixed_command(encoder, BIT_DEPTH, args.codec)
+    batches = batches_of(in_paths, out_paths, sizes, BATCH_SIZE, workers)
+    # Pinned jobs can't outnumber the core sets handed out to them
+    max_in_flight = PREFETCH_DEPTH if free_core_sets is None else workers
+
+    # All console output happens here in the main process. With many
+    # workers the per-file lines scroll past too fast to be useful, so show
+    # a progress bar instead (if tqdm is installed) and only print failures
+    progress = None
+    if tqdm is not None and workers >= QUIET_WORKERS:
+        progress = tqdm(total=len(in_paths) + duplicates, unit="file")
+
+    results: List[ConversionResult] = []
+    for packed in run_batches(executor, batches, fixed_cmd, max_in_flight, free_core_sets):
+        result = ConversionResult.unpack(packed)
+        if progress is None:
+            print(packed[5])
+        elif result.output_size == 0:
+            progress.write(packed[5])
+        results.append(result)
+        dups = copies.get(result.output_path, ())
+        for dup_input, dup_output in dups:
+            dup_size = result.output_size
+            if dup_size > 0:
+                try:
+                    copy_output(result.output_path, dup_output)
+                except OSError as e:
+                    # e.g. a locked destination: only this duplicate fails
+                    dup_size = 0
+                    message = f"{Fore.RED}Failed: {os.path.basename(dup_input)} (copy)\n   {e}{Colors.RESET}"
+                    (print if progress is None else progress.write)(message)
+            results.append(ConversionResult.unpack(
+                (dup_input, dup_output, result.input_size, dup_size, 0.0, "", 0)
+            ))
+        if progress is not None:
+            progress.update(1 + len(dups))
+    if progress is not None:
+        progress.close()
 
     total_time = time.perf_counter() - total_start
 
     successful = [r for r in results if r.output_size > 0 and r.ratio < 10]
     failed = len(results) - len(successful)
+    retried = [r for r in results if r.retries]
 
     if not successful:
         print(f"{Fore.RED}No files converted successfully.{Colors.RESET}")
@@ -212,7 +615,11 @@ def main():
     print(f"\n{Colors.HEADER}Conversion Complete!{Colors.RESET}\n")
     print(f"{Colors.TOTAL}Processed   : {len(results)} files ({len(successful)} success, {failed} failed)")
     print(f"{Colors.TOTAL}Total time  : {total_time:.2f}s "
-          f"({len(successful)/total_time:.1f} files/sec)\n")
+          f"({len(successful)/total_time:.1f} files/sec)")
+    if retried:
+        print(f"{Colors.TOTAL}Retried     : {len(retried)} files "
+              f"({sum(r.retries for r in retried)} retries after transient errors)")
+    print()
 
     print(f"{Colors.INFO}Size Summary:{Colors.RESET}")
     print(f"   Original → {format_bytes(total_input)}")
@@ -221,9 +628,9 @@ def main():
           f"({total_saved/total_input:.1%} smaller){Colors.RESET}\n")
 
     print(f"{Colors.AVG}Avg ratio   : {avg_ratio:.1%}{Colors.RESET}")
-    print(f"{Colors.BEST}Best        : {best.ratio:.1%} ← {best.input_path.name}{Colors.RESET}")
-    print(f"{Colors.WORST}Worst       : {worst.ratio:.1%} ← {worst.input_path.name}{Colors.RESET}")
-    print(f"{Colors.BEST}Most saved  : {format_bytes(most_saved.saved_bytes)} ← {most_saved.input_path.name}{Colors.RESET}")
+    print(f"{Colors.BEST}Best        : {best.ratio:.1%} ← {os.path.basename(best.input_path)}{Colors.RESET}")
+    print(f"{Colors.WORST}Worst       : {worst.ratio:.1%} ← {os.path.basename(worst.input_path)}{Colors.RESET}")
+    print(f"{Colors.BEST}Most saved  : {format_bytes(most_saved.saved_bytes)} ← {os.path.basename(most_saved.input_path)}{Colors.RESET}")
 
     print(f"\n{Colors.HEADER}Output → {output_root}{Colors.RESET}")
 
@@ -40,18 +40,32 @@ try:
 except ImportError:
     print("PIL/Pillow not available. Creating a simple PPM file instead...")
     
-    # Create a simple PPM file (no dependencies)
+    # Create a simple binary PPM (P6) gradient file
     width, height = 800, 600
-    with open('test_input.ppm', 'w') as f:
-        f.write(f'P3\n{width} {height}\n255\n')
+    try:
+        import numpy as np
+
+        x = np.arange(width, dtype=np.uint32)
+        y = np.arange(height, dtype=np.uint32)[:, None]
+        img = np.empty((height, width, 3), dtype=np.uint8)
+        img[:, :, 0] = 255 * x // width
+        img[:, :, 1] = 255 * y // height
+        img[:, :, 2] = 128
+        pixels = img.tobytes()
+    except ImportError:
+        # No numpy either: build each row from a precomputed red ramp
+        red = bytes(255 * x // width for x in range(width))
+        pixels = bytearray()
         for y in range(height):
-            for x in range(width):
-                # Create a gradient
-                r = int(255 * x / width)
-                g = int(255 * y / height)
-                b = 128
-                f.write(f'{r} {g} {b} ')
-            f.write('\n')
+            row = bytearray(3 * width)
+            row[0::3] = red
+            row[1::3] = bytes([255 * y // height]) * width
+            row[2::3] = b'\x80' * width
+            pixels += row
+
+    with open('test_input.ppm', 'wb') as f:
+        f.write(f'P6\n{width} {height}\n255\n'.encode('ascii'))
+        f.write(pixels)
     
     print("Created test_input.ppm (PPM format)")
     print("Note: bpgenc may not support PPM. Please convert to PNG or JPG first.")